@@ -32,34 +32,42 @@
 ################################################################################
 
 import hashlib
+import itertools
 import multiprocessing
 
-def door_code_part1(door_id):
-    code = ''
-    index = 0
-    while len(code) < 8:
-        value = f'{door_id}{index}'.encode()
-        digest = hashlib.md5(value).hexdigest()
-        if digest.startswith('00000'):
-            code += digest[5]
-        index += 1
-    return code
+CHUNK_SIZE = 100_000
 
-def door_code_part2(door_id):
-    code = [None] * 8
-    index = 0
-    while None in code:
-        value = f'{door_id}{index}'.encode()
-        digest = hashlib.md5(value).hexdigest()
-        if digest.startswith('00000'):
-            try:
-                code_index = int(digest[5])
-            except ValueError:
-                pass
-            if code_index < len(code) and code[code_index] is None:
-                code[code_index] = digest[6]
-        index += 1
-    return ''.join(code)
+def mine_chunk(door_id, start, stop):
+    # A hash starts with five zero hex digits when its first two bytes
+    # are zero and the high nibble of the third is zero.
+    prefix = hashlib.md5(door_id.encode())
+    hits = []
+    for index in range(start, stop):
+        md5 = prefix.copy()
+        md5.update(str(index).encode())
+        digest = md5.digest()
+        if digest[0] == 0 and digest[1] == 0 and digest[2] < 0x10:
+            hits.append((index, digest[2], digest[3] >> 4))
+    return hits
 
-print(f'The first door code is {door_code_part1("uqwqemis")}')
-print(f'The second door code is {door_code_part2("uqwqemis")}')
+def door_codes(door_id, chunk_size=CHUNK_SIZE, processes=None):
+    part1 = ''
+    part2 = [None] * 8
+    batch_size = (processes or multiprocessing.cpu_count()) * 4
+    with multiprocessing.Pool(processes) as pool:
+        starts = itertools.count(0, chunk_size)
+        while len(part1) < 8 or None in part2:
+            chunks = [(door_id, start, start + chunk_size)
+                      for start in itertools.islice(starts, batch_size)]
+            for hits in pool.starmap(mine_chunk, chunks):
+                for _, sixth, seventh in hits:
+                    if len(part1) < 8:
+                        part1 += f'{sixth:x}'
+                    if sixth < len(part2) and part2[sixth] is None:
+                        part2[sixth] = f'{seventh:x}'
+    return part1, ''.join(part2)
+
+if __name__ == '__main__':
+    part1, part2 = door_codes('uqwqemis')
+    print(f'The first door code is {part1}')
+    print(f'The second door code is {part2}')
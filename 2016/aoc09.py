@@ -74,6 +74,8 @@
 ################################################################################
 
 import enum
+import mmap
+import re
 
 class DecompressState(enum.Enum):
     normal = 0
@@ -119,6 +121,43 @@ def decompress(characters, initial, weight, reducer, decompress_repeated):
             assert False
     return result
 
+MARKER = re.compile(rb'\((\d+)x(\d+)\)')
+
+def decompressed_length(data, recursive=True):
+    # data is any bytes-like object (bytes, memoryview, mmap). Instead of
+    # recursing into each repeated section, keep a stack of (end offset,
+    # weight) frames, where weight is the product of the counts of the
+    # markers that section is nested in. Memory is O(nesting depth).
+    data = memoryview(data)
+    end = len(data)
+    while end > 0 and bytes(data[end - 1:end]).isspace():
+        end -= 1
+    frames = []
+    weight = 1
+    position = 0
+    total = 0
+    while position < end:
+        while frames and frames[-1][0] <= position:
+            frames.pop()
+            weight = frames[-1][1] if frames else 1
+        frame_end = frames[-1][0] if frames else end
+        marker = MARKER.search(data, position, frame_end)
+        if marker is None:
+            total += weight * (frame_end - position)
+            position = frame_end
+            continue
+        total += weight * (marker.start() - position)
+        length, count = int(marker[1]), int(marker[2])
+        position = marker.end()
+        section_end = min(position + length, frame_end)
+        if recursive:
+            weight *= count
+            frames.append((section_end, weight))
+        else:
+            total += weight * count * (section_end - position)
+            position = section_end
+    return total
+
 # test_strings = [
 #     'ADVENT',
 #     'A(1x5)BC',
@@ -142,14 +181,9 @@ def decompress(characters, initial, weight, reducer, decompress_repeated):
 #     result = decompress(test_string, 0, length_reducer, True)
 #     print(f'{test_string} => {result}')
 
-with open('aoc09.txt', 'r') as f:
-    def length_reducer(result, weight, chars):
-        result += weight * len(chars)
-        return result
-
-    input_data = f.read().strip()
-    length1 = decompress(input_data, 0, 1, length_reducer, False)
-    length2 = decompress(input_data, 0, 1, length_reducer, True)
+with open('aoc09.txt', 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+    length1 = decompressed_length(data, recursive=False)
+    length2 = decompressed_length(data, recursive=True)
 
     print(f'Part 1: The decompressed data is {length1} characters.')
     print(f'Part 2: The decompressed data is {length2} characters.')
@@ -45,6 +45,8 @@
 import collections
 import math
 
+import numpy as np
+
 Point = collections.namedtuple('Point', ['x', 'y'])
 
 def ring_for_square(square):
@@ -98,30 +100,72 @@ def distance_for_square(square):
     point = point_for_square(square)
     return distance_for_point(point)
 
+def distance_for_squares(squares):
+    # Vectorized distance_for_square. Square n sits in ring k, the
+    # smallest k with (2k + 1)^2 >= n, i.e. ceil(sqrt(n)) // 2, and is
+    # |offset - k| steps along its side from the side's midpoint.
+    squares = np.asarray(squares, dtype=np.int64)
+    assert np.all(squares > 0)
+    root = np.sqrt(squares).astype(np.int64)
+    root -= root * root > squares
+    root += (root + 1) * (root + 1) <= squares
+    ring = (root + (root * root < squares)) // 2
+    side = np.maximum(2 * ring, 1)
+    offset = ((2 * ring + 1) ** 2 - squares) % side
+    return np.where(squares == 1, 0, ring + np.abs(offset - ring))
+
+def spiral_points():
+    # Walk right 1, up 1, left 2, down 2, right 3, ... from the origin.
+    x = y = 0
+    yield x, y
+    leg = 1
+    while True:
+        for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            for _ in range(leg):
+                x += dx
+                y += dy
+                yield x, y
+            if dy != 0:
+                leg += 1
+
+def grow_grid(grid, offset):
+    # Pad the grid so the origin sits at twice the offset.
+    pad = offset
+    size = len(grid) + 2 * pad
+    grown = [[0] * size for _ in range(pad)]
+    grown += [[0] * pad + row + [0] * pad for row in grid]
+    grown += [[0] * size for _ in range(pad)]
+    return grown, offset + pad
+
+def first_stress_value_above(limit):
+    # Values grow geometrically, so the answer turns up within a few
+    # rings. Start small and double the grid whenever the walk reaches
+    # its spare border, so neighbour reads never leave it.
+    offset = 1
+    grid = [[0] * 3 for _ in range(3)]
+    grid[offset][offset] = 1
+    points = spiral_points()
+    next(points)
+    for x, y in points:
+        if max(abs(x), abs(y)) >= offset:
+            grid, offset = grow_grid(grid, offset)
+        above, row, below = grid[offset + y - 1:offset + y + 2]
+        column = offset + x
+        value = (sum(above[column - 1:column + 2]) + row[column - 1] + row[column + 1]
+                 + sum(below[column - 1:column + 2]))
+        row[column] = value
+        if value > limit:
+            return value
+
 # Part 1
 
 squares = [1, 12, 14, 18, 23, 1024, 277678]
-distances = map(distance_for_square, squares)
+distances = distance_for_squares(squares)
 
 for square, distance in zip(squares, distances):
     print(f'Data from square {square} is carried {distance} steps.')
 
 # Part 2
 
-stress_test_values = collections.defaultdict(lambda: 0, {})
-for square in range(1, 277678):
-    point = point_for_square(square)
-    if square == 1:
-        stress_test_values[point] = 1
-        continue
-
-    value = 0
-    for delta_x in range(-1, 2):
-        for delta_y in range(-1, 2):
-            adjacent_point = Point(point.x + delta_x, point.y + delta_y)
-            value += stress_test_values[adjacent_point]
-    stress_test_values[point] = value
-
-    if value > 277678:
-        print(f'First value larger than puzzle input: {value}')
-        break
+value = first_stress_value_above(277678)
+print(f'First value larger than puzzle input: {value}')
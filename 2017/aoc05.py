@@ -57,42 +57,104 @@
 
 ################################################################################
 
-def follow(modify_offset, offsets):
+from array import array
+
+INCREMENT, SETTLE = range(2)
+
+def follow(offsets, mode=INCREMENT):
+    # Part 1 (INCREMENT) always adds one to the offset just used. Part 2
+    # (SETTLE) subtracts one from offsets of 3 or more instead.
+    if mode == SETTLE:
+        return follow_settling(offsets)
     steps_count = 0
     offset_index = 0
-    while offset_index < len(offsets):
+    length = len(offsets)
+    while 0 <= offset_index < length:
         offset = offsets[offset_index]
-        new_offset_index = offset_index + offset
-
-        offsets[offset_index] = modify_offset(offset)
-        offset_index = new_offset_index
+        offsets[offset_index] = offset + 1
+        offset_index += offset
+        steps_count += 1
+    return steps_count
 
+# Under the part 2 rule a 2 becomes a 3 and a 3 becomes a 2, so once a
+# cell holds either it alternates between them forever, and the start of
+# the maze settles into a growing prefix of 2s and 3s. The settled prefix
+# is packed BLOCK cells at a time into ints (bit set for a 3), and a whole
+# pass through a block is one table lookup.
+BLOCK = 12
+_block_tables = None
+
+def block_tables():
+    # Indexed by bits * BLOCK + entry: where the walk leaves the block
+    # (BLOCK to BLOCK + 2), how many steps that took and the new bits.
+    global _block_tables
+    if _block_tables is None:
+        exits, counts, results = [], [], []
+        for bits in range(1 << BLOCK):
+            for entry in range(BLOCK):
+                index, count, result = entry, 0, bits
+                while index < BLOCK:
+                    bit = 1 << index
+                    index += 3 if result & bit else 2
+                    result ^= bit
+                    count += 1
+                exits.append(index)
+                counts.append(count)
+                results.append(result)
+        _block_tables = exits, counts, results
+    return _block_tables
+
+def follow_settling(offsets):
+    exits, counts, results = block_tables()
+    packed = []
+    packed_end = 0
+    settled = 0
+    steps_count = 0
+    offset_index = 0
+    length = len(offsets)
+    while 0 <= offset_index < length:
+        if offset_index < packed_end:
+            block, entry = divmod(offset_index, BLOCK)
+            key = packed[block] * BLOCK + entry
+            packed[block] = results[key]
+            steps_count += counts[key]
+            offset_index = block * BLOCK + exits[key]
+            continue
+        offset = offsets[offset_index]
+        offsets[offset_index] = offset - 1 if offset >= 3 else offset + 1
+        if offset_index == settled:
+            while settled < length and 2 <= offsets[settled] <= 3:
+                settled += 1
+            while packed_end + BLOCK <= settled:
+                bits = 0
+                for i in range(BLOCK):
+                    if offsets[packed_end + i] == 3:
+                        bits |= 1 << i
+                packed.append(bits)
+                packed_end += BLOCK
+        offset_index += offset
         steps_count += 1
+    # Write the packed blocks back so offsets ends up as if stepped.
+    for block, bits in enumerate(packed):
+        for i in range(BLOCK):
+            offsets[block * BLOCK + i] = 3 if bits >> i & 1 else 2
     return steps_count
 
 def follow_part1(offsets):
-    def modify_offset(offset):
-        return offset + 1
-    return follow(modify_offset, offsets)
+    return follow(offsets, INCREMENT)
 
 def follow_part2(offsets):
-    def modify_offset(offset):
-        if offset >= 3:
-            return offset - 1
-        else:
-            return offset + 1
-    return follow(modify_offset, offsets)
+    return follow(offsets, SETTLE)
 
 def parse_offsets(offsets_string):
     lines = offsets_string.strip().split('\n')
-    return list(map(int, lines))
+    return array('i', map(int, lines))
 
 with open('aoc05.txt', 'r') as f:
     offsets = parse_offsets(f.read())
-    steps_count = follow_part1(offsets)
-    print(f'Part 1: Took {steps_count} steps to exit.')
 
-with open('aoc05.txt', 'r') as f:
-    offsets = parse_offsets(f.read())
-    steps_count = follow_part2(offsets)
-    print(f'Part 2: Took {steps_count} steps to exit.')
+steps_count = follow_part1(offsets[:])
+print(f'Part 1: Took {steps_count} steps to exit.')
+
+steps_count = follow_part2(offsets[:])
+print(f'Part 2: Took {steps_count} steps to exit.')
@@ -64,15 +64,17 @@
 ################################################################################
 
 def redistribute(banks):
+    # Hand out whole rounds at once: every bank gets blocks // len, and
+    # the remainder goes one each to the banks after the emptied one.
     blocks = max(banks)
     bank_index = banks.index(blocks)
+    rounds, remainder = divmod(blocks, len(banks))
 
     banks_list = list(banks)
     banks_list[bank_index] = 0
-    while blocks > 0:
-        bank_index = (bank_index + 1) % len(banks_list)
-        banks_list[bank_index] += 1
-        blocks -= 1
+    banks_list = [bank + rounds for bank in banks_list]
+    for offset in range(1, remainder + 1):
+        banks_list[(bank_index + offset) % len(banks_list)] += 1
 
     return tuple(banks_list)
 
@@ -87,8 +89,31 @@ def find_cycle(banks):
         steps += 1
     return steps, steps - seen[banks]
 
+def find_cycle_brent(banks):
+    # Brent's cycle detection: O(1) states in memory instead of every
+    # state seen. Returns the same (steps, cycle size) as find_cycle.
+    power = cycle_size = 1
+    tortoise, hare = banks, redistribute(banks)
+    while tortoise != hare:
+        if power == cycle_size:
+            tortoise = hare
+            power *= 2
+            cycle_size = 0
+        hare = redistribute(hare)
+        cycle_size += 1
+
+    tortoise = hare = banks
+    for _ in range(cycle_size):
+        hare = redistribute(hare)
+    first_repeat = 0
+    while tortoise != hare:
+        tortoise = redistribute(tortoise)
+        hare = redistribute(hare)
+        first_repeat += 1
+    return first_repeat + cycle_size, cycle_size
+
 #banks = (0, 2, 7, 0)
 banks = (10, 3, 15, 10, 5, 15, 5, 15, 9, 2, 5, 8, 5, 2, 3, 6)
-steps, count = find_cycle(banks)
+steps, count = find_cycle_brent(banks)
 print(f'Part 1: Cycle happens in {steps} total steps.')
 print(f'Part 2: Cycle size is {count} steps.')
@@ -101,6 +101,7 @@
 
 import collections
 import re
+import sys
 
 class Tower:
     def __init__(self, name, weight, parent, children):
@@ -168,6 +169,73 @@ def find_balanced_weight(root):
         root.children)
     return bad_child.weight + delta_weight
 
+class TowerTree:
+    # The same tree as Tower, but as parallel lists indexed by program
+    # number, with every pass iterative so depth doesn't matter.
+    __slots__ = ('names', 'weights', 'parents', 'children', 'total_weights', 'root')
+
+    def __init__(self, towers):
+        index = {name: i for i, (name, _, _) in enumerate(towers)}
+        self.names = [name for name, _, _ in towers]
+        self.weights = [weight for _, weight, _ in towers]
+        self.parents = [None] * len(towers)
+        self.children = [[index[child] for child in children] for _, _, children in towers]
+        for node, children in enumerate(self.children):
+            for child in children:
+                self.parents[child] = node
+        roots = [node for node, parent in enumerate(self.parents) if parent is None]
+        assert len(roots) == 1
+        self.root = roots[0]
+        self.total_weights = self._total_weights()
+
+    def _total_weights(self):
+        # Parents come before children in breadth-first order, so walking
+        # it backwards is a post-order pass.
+        order = [self.root]
+        for node in order:
+            order.extend(self.children[node])
+        totals = self.weights[:]
+        for node in reversed(order):
+            parent = self.parents[node]
+            if parent is not None:
+                totals[parent] += totals[node]
+        return totals
+
+    def balanced_weight(self):
+        # Follow the child whose total differs from its siblings until
+        # reaching one whose own children agree: that program is wrong.
+        node, delta = self.root, 0
+        while True:
+            child_weights = collections.Counter(
+                self.total_weights[child] for child in self.children[node])
+            if len(child_weights) < 2:
+                return None if node == self.root else self.weights[node] + delta
+            (good_weight, _), *_, (bad_weight, _) = child_weights.most_common()
+            delta = good_weight - bad_weight
+            node = next(child for child in self.children[node]
+                        if self.total_weights[child] == bad_weight)
+
+    def write(self, file):
+        # Writes the same text as repr(Tower), without building it first.
+        stack = [(self.root, 0)]
+        while stack:
+            node, indent = stack.pop()
+            if isinstance(node, str):
+                file.write(node)
+                continue
+            file.write(f'{" " * indent}({self.names[node]}'
+                       f'[{self.weights[node]},{self.total_weights[node]}]')
+            children = self.children[node]
+            if not children:
+                file.write(')')
+                continue
+            file.write('\n')
+            stack.append((')', None))
+            for i, child in enumerate(reversed(children)):
+                if i > 0:
+                    stack.append((',\n', None))
+                stack.append((child, indent + 4))
+
 def parse_towers_list(input):
     def parse_tower(line):
         line = re.sub(r'[->,\(\)]', '', line)
@@ -193,7 +261,9 @@ def parse_towers_list(input):
 with open('aoc07.txt', 'r') as f:
     # towers = parse_towers_list(input)
     towers = parse_towers_list(f.read())
-    root = make_tree(towers)
-    balanced_weight = find_balanced_weight(root)
-    print(f'Part 1: The root of the towers is\n{root}')
+    tree = TowerTree(towers)
+    balanced_weight = tree.balanced_weight()
+    print('Part 1: The root of the towers is')
+    tree.write(sys.stdout)
+    print()
     print(f'Part 2: The balanced weight is {balanced_weight}.')
@@ -44,80 +44,69 @@
 
 ################################################################################
 
-from collections import defaultdict, namedtuple
-import re
-
-Instruction = namedtuple('Instruction', [
-    'register',
-    'operation',
-    'argument',
-    'test_register',
-    'test',
-    'test_argument',
-])
-
-TESTS = {
-    '>': lambda x,y: x > y,
-    '<': lambda x,y: x < y,
-    '>=': lambda x,y: x >= y,
-    '<=': lambda x,y: x <= y,
-    '==': lambda x,y: x == y,
-    '!=': lambda x,y: x != y,
+import operator
+
+COMPARISONS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
 }
 
-def test(instruction, registers):
-    '''Return true if instruction's test is true, otherwise return false.'''
-    test = instruction.test
-    test_register_value = registers[instruction.test_register]
-    test_argument = instruction.test_argument
-    return TESTS[test](test_register_value, test_argument)
-
-def operate(instruction, registers):
-    '''Perform the operation indicated by the instruction.'''
-    register = instruction.register
-    operation = instruction.operation
-    argument = instruction.argument
-    if operation == 'inc':
-        registers[register] += argument
-    elif operation == 'dec':
-        registers[register] -= argument
-    else:
-        assert False, f'Unknown operation: {operation}'
-    
-def execute(instructions, registers):
-    '''Execute the operations. Return a list of the max value after each
-    operation.'''
-    max_values = []
-    for instruction in instructions:
-        if test(instruction, registers):
-            operate(instruction, registers)
-        max_values.append(max_value(registers))
-    return max_values
-
-def max_value(registers):
-    return max(registers.values())
-
-def parse_instructions(instructions):
-    def parse_instruction(line):
-        tokens = re.split(r'\s+', line)
-        return Instruction(
-            register=tokens[0],
-            operation=tokens[1],
-            argument=int(tokens[2]),
-            test_register=tokens[4],
-            test=tokens[5],
-            test_argument=int(tokens[6])
-        )
-    return map(parse_instruction, instructions.splitlines())
+class RegisterFile:
+    '''Register values in a list, with names mapped to slots as they
+    first appear.'''
+    def __init__(self):
+        self.slots = {}
+        self.values = []
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.values)
+            self.values.append(0)
+        return slot
+
+    def __getitem__(self, name):
+        return self.values[self.slots[name]]
+
+def compile_instructions(lines, registers):
+    '''Yield each line as (slot, delta, test slot, comparison, test
+    argument), with dec folded into a negative delta.'''
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        register, operation, argument, _, test_register, test, test_argument = tokens
+        delta = int(argument)
+        if operation == 'dec':
+            delta = -delta
+        else:
+            assert operation == 'inc', f'Unknown operation: {operation}'
+        yield (registers.slot(register), delta, registers.slot(test_register),
+               COMPARISONS[test], int(test_argument))
+
+def execute(program, registers):
+    '''Execute the compiled program. Return the largest value at the end
+    and the largest value ever held.'''
+    values = registers.values
+    largest_ever = 0
+    for slot, delta, test_slot, comparison, test_argument in program:
+        if comparison(values[test_slot], test_argument):
+            value = values[slot] + delta
+            values[slot] = value
+            if value > largest_ever:
+                largest_ever = value
+    return max(values, default=0), largest_ever
 
 def main():
+    registers = RegisterFile()
     with open('aoc08.txt', 'r') as f:
-        source_code = f.read()
-    instructions = parse_instructions(source_code)
-    registers = defaultdict(lambda: 0)
-    max_values = execute(instructions, registers)
+        largest, largest_ever = execute(compile_instructions(f, registers), registers)
 
-    print(f'Part 1: The largest value at the end is {max_values[-1]}')
-    print(f'Part 2: The largest ever is {max(max_values)}')
+    print(f'Part 1: The largest value at the end is {largest}')
+    print(f'Part 2: The largest ever is {largest_ever}')
 
 main()
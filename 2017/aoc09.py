@@ -82,45 +82,71 @@
 
 ################################################################################
 
+import re
+
+GARBAGE_END = re.compile(rb'[!>]')
+GROUP_TOKEN = re.compile(rb'[{}<]')
+
+class StreamScanner:
+    '''Scores a stream fed in byte chunks of any size.'''
+    def __init__(self):
+        self.in_garbage = False
+        self.ignore_next = False
+        self.nesting_level = 0
+        self.score = 0
+        self.garbage_count = 0
+
+    def feed(self, chunk):
+        position = 0
+        end = len(chunk)
+        if self.ignore_next and end > 0:
+            # the '!' ending the previous chunk cancels our first byte
+            position = 1
+            self.ignore_next = False
+        while position < end:
+            if self.in_garbage:
+                # skip straight to the next '!' or '>'
+                match = GARBAGE_END.search(chunk, position)
+                if match is None:
+                    self.garbage_count += end - position
+                    break
+                index = match.start()
+                self.garbage_count += index - position
+                if chunk[index] == ord('!'):
+                    position = index + 2
+                    self.ignore_next = position > end
+                else:
+                    self.in_garbage = False
+                    position = index + 1
+            else:
+                # commas and whitespace between groups don't matter
+                match = GROUP_TOKEN.search(chunk, position)
+                if match is None:
+                    break
+                index = match.start()
+                token = chunk[index]
+                if token == ord('{'):
+                    self.nesting_level += 1
+                elif token == ord('}'):
+                    self.score += self.nesting_level
+                    self.nesting_level -= 1
+                else:
+                    self.in_garbage = True
+                position = index + 1
+
 def score_and_garbage_count(input):
     '''Return (score, garbage_count) as described in the problem.'''
-    in_garbage = False
-    ignore_next = False
-    nesting_level = 0
-    score = 0
-    garbage_count = 0
-
-    for character in input:
-        if ignore_next:
-            # ignore one cancelled character
-            ignore_next = False
-        elif in_garbage:
-            if character == '!':
-                # ignore the next character, even '>'
-                ignore_next = True
-            elif character == '>':
-                # end of garbage
-                in_garbage = False
-            else:
-                # ignore some garbage
-                garbage_count += 1
-        elif character == '<':
-            in_garbage = True
-        elif character == '{':
-            # begin group
-            nesting_level += 1
-        elif character == '}':
-            # end group
-            score += nesting_level
-            nesting_level -= 1
-        elif character == ',':
-            # ignore commas
-            pass
-        else:
-            # anything else is invalid input
-            assert False
-
-    return score, garbage_count
+    scanner = StreamScanner()
+    scanner.feed(input.encode())
+    return scanner.score, scanner.garbage_count
+
+def scan_file(path, chunk_size=1 << 20):
+    '''Return (score, garbage_count) for a file, reading it in chunks.'''
+    scanner = StreamScanner()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            scanner.feed(chunk)
+    return scanner.score, scanner.garbage_count
 
 # inputs = [
 #     '{}',
@@ -135,8 +161,6 @@ def score_and_garbage_count(input):
 # for input in inputs:
 #     print(f'{input} -> {score(input)}')
 
-with open('aoc09.txt', 'r') as f:
-    data = f.read().strip()
-    score, garbage_count = score_and_garbage_count(data)
-    print(f'Part 1: The score is {score}.')
-    print(f'Part 2: The garbage had {garbage_count} characters.')
+score, garbage_count = scan_file('aoc09.txt')
+print(f'Part 1: The score is {score}.')
+print(f'Part 2: The garbage had {garbage_count} characters.')
@@ -156,55 +156,17 @@
 
 ################################################################################
 
-def hash_lengths(lengths, rounds=1, position=0, skip=0):
-    numbers = list(range(256))
-    position = 0
-    skip = 0
-    #print(numbers)
-    for _ in range(rounds):
-        for length in lengths:
-            for i in range(length // 2):
-                lhs_index = (position + i) % len(numbers)
-                rhs_index = (position + length - i - 1) % len(numbers)
-                numbers[lhs_index], numbers[rhs_index] = numbers[rhs_index], numbers[lhs_index]
-                #print(f'l={lhs_index} r={rhs_index} n={numbers}')
-            #print(f'{length} => {numbers}')
-            position += length + skip
-            skip += 1
-    return numbers, position, skip
-
-def densify(numbers):
-    result = []
-    for block_index in range(16):
-        block_result = 0
-        for index in range(16):
-            block_result = block_result ^ numbers[block_index * 16 + index]
-        result.append(block_result)
-    return result
+from knothash import hash_lengths, knot_hash
 
 def parse_lengths_1(input):
     return list(map(int, input.strip().split(',')))
 
-def parse_lengths_2(input):
-    def parse_character(character):
-        return ord(character)
-    return list(map(ord, input.strip()))
-
 with open('aoc10.txt', 'r') as f:
     input = f.read()
     lengths = parse_lengths_1(input)
-    hashed, *_ = hash_lengths(lengths, 1)
+    hashed = hash_lengths(lengths, 1)
     product = hashed[0] * hashed[1]
     print(f'Part 1 product: {product}')
 
-    lengths_2 = parse_lengths_2(input)
-    lengths_2 += [17, 31, 73, 47, 23]
-    numbers, position, skip = [], 0, 0
-    for _ in range(64):
-        numbers, position, skip = hash_lengths(lengths_2, 64, position, skip)
-    dense_hash = densify(numbers)
-    dense_hash_string = ''
-    for h in dense_hash:
-        dense_hash_string += '%x' % h
+    dense_hash_string = knot_hash(input.strip())
     print(f'Part 2 hash: {dense_hash_string}')
-
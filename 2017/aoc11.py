@@ -1,3 +1,5 @@
+import numpy as np
+
 def navigate(coordinate, direction):
     x, y, z = coordinate
     if direction == 'n':
@@ -29,14 +31,73 @@ def distance(coordinate):
 def parse_input(input):
     return input.strip().split(',')
 
-with open('aoc11.txt', 'r') as f:
-    directions = parse_input(f.read())
+# Cube coordinate steps for each direction, indexed by a token code of
+# first byte * 256 + second byte (0 for one-letter directions).
+DIRECTIONS = {
+    b'n': (0, 1, -1),
+    b'ne': (1, 0, -1),
+    b'se': (1, -1, 0),
+    b's': (0, -1, 1),
+    b'sw': (-1, 0, 1),
+    b'nw': (-1, 1, 0),
+}
+TOKEN_INDEX = np.full(1 << 16, -1, dtype=np.int8)
+for index, token in enumerate(DIRECTIONS):
+    TOKEN_INDEX[token[0] * 256 + (token[1] if len(token) > 1 else 0)] = index
+DELTAS = np.array(list(DIRECTIONS.values()), dtype=np.int8)
+
+def token_indices(data):
+    # data holds whole comma-separated tokens with no surrounding space.
+    # Every byte gets a code from itself and the byte after it (0 if
+    # that is a comma), and the codes at token starts are kept.
+    chars = np.frombuffer(data, dtype=np.uint8)
+    letters = chars != ord(',')
+    assert not np.any(letters[:-2] & letters[1:-1] & letters[2:]), 'Unknown direction'
+    codes = chars.astype(np.uint16)
+    codes <<= 8
+    codes[:-1] |= chars[1:] * letters[1:]
+    starts = np.empty(len(chars), dtype=bool)
+    starts[0] = True
+    np.logical_not(letters[:-1], out=starts[1:])
+    del letters
+    indices = TOKEN_INDEX[codes[starts]]
+    assert np.all(indices >= 0), 'Unknown direction'
+    return indices
+
+def reduce_path(data, start=(0, 0, 0), max_dist=0):
+    '''Return the end coordinate and the largest distance seen.'''
+    if not data:
+        return start, max_dist
+    # In cube coordinates the distance is also the largest of |x|, |y|
+    # and |z|, so each axis can be summed and bounded on its own. Offsets
+    # from start fit in int32 for any chunk under 2 GiB.
+    indices = token_indices(data)
+    end = []
+    for axis, origin in enumerate(start):
+        offsets = np.cumsum(DELTAS[indices, axis], dtype=np.int32)
+        end.append(origin + int(offsets[-1]))
+        max_dist = max(max_dist, origin + int(offsets.max()), -origin - int(offsets.min()))
+    return tuple(end), max_dist
+
+def reduce_file(path, chunk_size=1 << 22):
+    # Tokens can straddle chunks, so anything after a chunk's last comma
+    # is carried over to the next one along with the partial sum. Peak
+    # memory is about eight bytes per byte of chunk: three copies of the
+    # chunk while slicing, plus its uint16 byte codes and masks.
+    coordinate, max_dist = (0, 0, 0), 0
+    pending = b''
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            data = pending + chunk
+            cut = data.rfind(b',')
+            if cut < 0:
+                pending = data
+                continue
+            pending = data[cut + 1:]
+            coordinate, max_dist = reduce_path(data[:cut].strip(), coordinate, max_dist)
+    return reduce_path(pending.strip(), coordinate, max_dist)
 
-coordinate = 0, 0, 0
-max_dist = 0
-for direction in directions:
-    coordinate = navigate(coordinate, direction)
-    max_dist = max(max_dist, distance(coordinate))
+coordinate, max_dist = reduce_file('aoc11.txt')
 dist = distance(coordinate)
 print(f'Part 1: The distance from origin is: {dist}')
 print(f'Part 2: The maximum ever distance from origin is: {max_dist}')
@@ -67,14 +67,47 @@
 
 ################################################################################
 
-def walk(graph, vertex, seen=None):
-    if seen is None:
-        seen = set()
-    if vertex not in seen:
-        seen.add(vertex)
-        for neighbor in graph[vertex]:
-            walk(graph, neighbor, seen)
-    return seen
+class Components:
+    # Union-find over program IDs, with path halving and union by size.
+    def __init__(self, count=0):
+        self.parent = list(range(count))
+        self.size = [1] * count
+
+    @classmethod
+    def from_graph(cls, graph):
+        components = cls(len(graph))
+        for vertex, neighbors in enumerate(graph):
+            for neighbor in neighbors:
+                components.add_edge(vertex, neighbor)
+        return components
+
+    def find(self, vertex):
+        parent = self.parent
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    def add_edge(self, a, b):
+        while max(a, b) >= len(self.parent):
+            self.parent.append(len(self.parent))
+            self.size.append(1)
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def component_size(self, vertex):
+        return self.size[self.find(vertex)]
+
+    def component_ids(self):
+        return [self.find(vertex) for vertex in range(len(self.parent))]
+
+    def component_sizes(self):
+        return {root: self.size[root] for root in set(self.component_ids())}
 
 def parse_input(input):
     def parse_line(line):
@@ -96,13 +129,8 @@ with open('aoc12.txt', 'r') as f:
     input = f.read()
 
 graph = parse_input(input)
-seen = walk(graph, 0)
-print(f'Part 1: {len(seen)} programs connected to program 0.')
-
-groups = 1
-not_seen = set([i for i in range(len(graph)) if i not in seen])
-while len(not_seen) > 0:
-    seen = walk(graph, not_seen.pop())
-    not_seen -= seen
-    groups += 1
+components = Components.from_graph(graph)
+print(f'Part 1: {components.component_size(0)} programs connected to program 0.')
+
+groups = len(components.component_sizes())
 print(f'Part 2: {groups} groups of programs.')
@@ -319,6 +319,9 @@
 
 ################################################################################
 
+import math
+
+import numpy as np
 
 layers = {
     0: 3,
@@ -356,6 +359,59 @@ def trip_severity(layers, delay=0):
             ever_caught = True
     return severity, ever_caught
 
+def scanner_periods(layers):
+    # The scanner in a layer of range r is back at the top every
+    # 2 * (r - 1) picoseconds; a range-1 scanner never leaves it. A
+    # packet delayed by `delay` reaches layer d at delay + d, so it is
+    # caught there exactly when delay == -d (mod period).
+    periods = {}
+    for depth, range in layers.items():
+        period = max(2 * (range - 1), 1)
+        periods.setdefault(period, set()).add(-depth % period)
+    return periods
+
+def fast_trip_severity(layers):
+    return sum(depth * range for depth, range in layers.items()
+               if depth % max(2 * (range - 1), 1) == 0)
+
+def forbidden_residues(periods):
+    # A residue caught modulo q is also caught at every matching residue
+    # modulo any multiple of q, so fold each period's residues into the
+    # periods it divides.
+    folded = {}
+    for period in periods:
+        residues = set()
+        for divisor, divisor_residues in periods.items():
+            if period % divisor == 0:
+                for residue in divisor_residues:
+                    residues.update(range(residue, period, divisor))
+        folded[period] = residues
+    return folded
+
+def find_safe_delay(layers, block_size=1 << 20, limit=None):
+    # If some period has every residue caught, no delay is safe.
+    # Otherwise the pattern of safe delays repeats every lcm(periods), so
+    # the sieve stops there, or at `limit` if given. Residues can still
+    # cover every delay jointly across periods that don't divide one
+    # another, and then the whole lcm gets sieved, so pass a limit for
+    # large configs that may be unsatisfiable.
+    periods = scanner_periods(layers)
+    if any(len(residues) == period
+           for period, residues in forbidden_residues(periods).items()):
+        return None
+    limit = math.lcm(*periods) if limit is None else min(limit, math.lcm(*periods))
+    base = 0
+    while base < limit:
+        safe = np.ones(min(block_size, limit - base), dtype=bool)
+        for period, residues in periods.items():
+            for residue in residues:
+                safe[(residue - base) % period::period] = False
+        (candidates,) = np.nonzero(safe)
+        if len(candidates) > 0:
+            return base + int(candidates[0])
+        base += block_size
+    return None
+
 def parse_levels(levels_input):
     def parse_level(line):
         level, range = map(int, line.split(': '))
@@ -365,16 +421,8 @@ def parse_levels(levels_input):
 with open('aoc13.txt', 'r') as f:
     layers = parse_levels(f.read())
 
-severity, _ = trip_severity(layers)
+severity = fast_trip_severity(layers)
 print(f'Part 1: Severity is {severity}.')
 
-safe_delay = None
-for delay in range(4000000):
-    _, caught = trip_severity(layers, delay=delay)
-    if not caught:
-        safe_delay = delay
-        break
-    if delay % 10000 == 0:
-        print(f'Delay {delay}...')
+safe_delay = find_safe_delay(layers)
 print(f'Part 2: Minimum safe delay is {safe_delay}.')
-        
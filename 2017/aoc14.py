@@ -79,74 +79,63 @@
 
 ################################################################################
 
-def knot_hash(string):
-    def hash_lengths(lengths, rounds=64):
-        numbers = list(range(256))
-        position = 0
-        skip = 0
-        for _ in range(rounds):
-            for length in lengths:
-                for i in range(length // 2):
-                    lhs_index = (position + i) % len(numbers)
-                    rhs_index = (position + length - i - 1) % len(numbers)
-                    numbers[lhs_index], numbers[rhs_index] = numbers[rhs_index], numbers[lhs_index]
-                position += length + skip
-                skip += 1
-        return numbers
-
-    def densify(numbers):
-        result = []
-        for block_index in range(16):
-            block_result = 0
-            for index in range(16):
-                block_result = block_result ^ numbers[block_index * 16 + index]
-            result.append(block_result)
-        return result
-
-    def hexformat(number):
-        return f'{number:02x}'
-
-    lengths = [ord(c) for c in string] + [17, 31, 73, 47, 23]
-    numbers = hash_lengths(lengths)
-    return ''.join(map(hexformat, densify(numbers)))
-
-def build_disk(key):
-    hashes = [knot_hash(f'{key}-{row}') for row in range(128)]
-    return [int(hash, base=16) for hash in hashes]
-
-def is_used(x, y, disk):
-    if x < 0 or x > 127 or y < 0 or y > 127:
-        return False
-    row = disk[y]
-    bit = row & (2 ** (127 - x))
-    return bit != 0
+from knothash import dense_hashes
+
+def build_disk(key, rows=128, width=1):
+    # Each row joins `width` consecutive hashes, high bits first, so the
+    # hashes stay numbered key-0, key-1, ... in reading order.
+    hashes = dense_hashes([f'{key}-{n}' for n in range(rows * width)])
+    return [int.from_bytes(row.tobytes(), 'big') for row in hashes.reshape(rows, -1)]
+
+# Rows are bitboards: any number of rows of any width, with bit i of a
+# row being the square i places from its right-hand end.
 
 def count_used_squares(disk):
-    total_used = 0
-    for y in range(128):
-        for x in range(128):
-            if is_used(x, y, disk):
-                total_used += 1
-    return total_used
+    return sum(row.bit_count() for row in disk)
+
+def row_runs(row):
+    # Masks of the maximal runs of set bits in row, lowest first.
+    runs = []
+    while row:
+        low = row & -row
+        run = row & ~(row + low)
+        runs.append(run)
+        row ^= run
+    return runs
 
 def count_used_regions(disk):
-    regions = [[None] * 128 for _ in range(128)]
-    def mark_region(x, y, region):
-        if not is_used(x, y, disk) or regions[y][x]:
-            return
-        regions[y][x] = region
-        mark_region(x - 1, y, region)
-        mark_region(x + 1, y, region)
-        mark_region(x, y - 1, region)
-        mark_region(x, y + 1, region)
-    next_region_id = 1
-    for y in range(128):
-        for x in range(128):
-            if not regions[y][x] and is_used(x, y, disk):
-                mark_region(x, y, next_region_id)
-                next_region_id += 1
-    return next_region_id - 1
-                
+    # Each run of used squares in a row starts as its own region, and is
+    # merged with every run it touches in the row above.
+    parent = []
+    def find(run):
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    regions = 0
+    previous = []
+    for row in disk:
+        current = []
+        for run in row_runs(row):
+            current.append((run, len(parent)))
+            parent.append(len(parent))
+            regions += 1
+        i = j = 0
+        while i < len(current) and j < len(previous):
+            (run, run_id), (above, above_id) = current[i], previous[j]
+            if run & above:
+                a, b = find(run_id), find(above_id)
+                if a != b:
+                    parent[a] = b
+                    regions -= 1
+            top, above_top = run.bit_length(), above.bit_length()
+            if top <= above_top:
+                i += 1
+            if above_top <= top:
+                j += 1
+        previous = current
+    return regions
 
 key = 'oundnydw'
 disk = build_disk(key)
@@ -126,12 +126,17 @@
 import itertools
 import multiprocessing
 
+import numpy as np
+
 FACTOR_A = 16807
 FACTOR_B = 48271
 
 MULTIPLE_A = 4
 MULTIPLE_B = 8
 
+MODULUS = 2147483647
+BLOCK_SIZE = 1 << 20
+
 def generator(factor, initial_value, multiple=1):
     value = initial_value
     while True:
@@ -146,18 +151,71 @@ def count_matches(gen_a, gen_b, limit):
             result += 1
     return result
 
-def part1():
-    gen_a = generator(FACTOR_A, 289)
-    gen_b = generator(FACTOR_B, 629)
-    return count_matches(gen_a, gen_b, 40_000_000)
-
-def part2():
-    gen_a = generator(FACTOR_A, 289, MULTIPLE_A)
-    gen_b = generator(FACTOR_B, 629, MULTIPLE_B)
-    return count_matches(gen_a, gen_b, 5_000_000)
-
-with multiprocessing.Pool() as pool:
-    async_results = [pool.apply_async(f, ()) for f in [part1, part2]]
-    part1_count, part2_count = [r.get() for r in async_results]
+def skip_ahead(factor, value, steps):
+    return value * pow(factor, steps, MODULUS) % MODULUS
+
+def block_powers(factor, size):
+    # powers[k] == factor ** (k + 1) % MODULUS. Every operand stays below
+    # 2 ** 31, so products fit in uint64 without overflowing.
+    powers = np.empty(size, dtype=np.uint64)
+    powers[0] = factor
+    filled = 1
+    while filled < size:
+        n = min(filled, size - filled)
+        step = np.uint64(pow(factor, filled, MODULUS))
+        powers[filled:filled + n] = powers[:n] * step % np.uint64(MODULUS)
+        filled += n
+    return powers
+
+def generated_blocks(factor, value, count=None, block_size=BLOCK_SIZE):
+    # Yields the next `count` values (forever if None) in NumPy blocks.
+    powers = block_powers(factor, block_size)
+    while count is None or count > 0:
+        size = block_size if count is None else min(block_size, count)
+        block = powers[:size] * np.uint64(value) % np.uint64(MODULUS)
+        value = int(block[-1])
+        if count is not None:
+            count -= size
+        yield block
+
+def filtered_values(factor, value, multiple, count):
+    chunks = []
+    found = 0
+    for block in generated_blocks(factor, value):
+        chunk = block[block % np.uint64(multiple) == 0]
+        chunks.append(chunk)
+        found += len(chunk)
+        if found >= count:
+            break
+    return np.concatenate(chunks)[:count]
+
+def count_block_matches(blocks_a, blocks_b):
+    mask = np.uint64(0xffff)
+    return sum(int(np.count_nonzero((a & mask) == (b & mask)))
+               for a, b in zip(blocks_a, blocks_b))
+
+def count_range_matches(seed_a, seed_b, start, count):
+    value_a = skip_ahead(FACTOR_A, seed_a, start)
+    value_b = skip_ahead(FACTOR_B, seed_b, start)
+    return count_block_matches(generated_blocks(FACTOR_A, value_a, count),
+                               generated_blocks(FACTOR_B, value_b, count))
+
+def part1(pool, seed_a=289, seed_b=629, limit=40_000_000, chunks=16):
+    # Jumping ahead lets every worker start its slice of the sequence
+    # directly, without generating the values before it.
+    size = -(-limit // chunks)
+    ranges = [(seed_a, seed_b, start, min(size, limit - start))
+              for start in range(0, limit, size)]
+    return sum(pool.starmap(count_range_matches, ranges))
+
+def part2(seed_a=289, seed_b=629, limit=5_000_000):
+    values_a = filtered_values(FACTOR_A, seed_a, MULTIPLE_A, limit)
+    values_b = filtered_values(FACTOR_B, seed_b, MULTIPLE_B, limit)
+    return count_block_matches([values_a], [values_b])
+
+if __name__ == '__main__':
+    with multiprocessing.Pool() as pool:
+        part1_count = part1(pool)
+    part2_count = part2()
     print(f'Part 1: There were {part1_count} matches.')
     print(f'Part 2: There were {part2_count} matches.')
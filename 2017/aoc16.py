@@ -72,6 +72,37 @@ def dance(programs, dance_steps):
         else:
             assert False
 
+def compile_dance(dance_steps, programs_count):
+    # Spins and exchanges move positions regardless of who stands there;
+    # partners swap names regardless of where they stand. So a dance is
+    # a position permutation followed by a label permutation:
+    # positions[i] is the index that ends up at i, and labels[x] is the
+    # label that x ends up with.
+    positions = list(range(programs_count))
+    dance(positions, [s for s in dance_steps if s[0] != 'p'])
+    labels = [chr(ord('a') + i) for i in range(programs_count)]
+    dance(labels, [s for s in dance_steps if s[0] == 'p'])
+    return positions, [ord(label) - ord('a') for label in labels]
+
+def compose(p, q):
+    return [p[i] for i in q]
+
+def permutation_power(permutation, n):
+    result = list(range(len(permutation)))
+    while n > 0:
+        if n & 1:
+            result = compose(result, permutation)
+        permutation = compose(permutation, permutation)
+        n >>= 1
+    return result
+
+def dance_times(programs, dance_steps, n):
+    positions, labels = compile_dance(dance_steps, len(programs))
+    positions = permutation_power(positions, n)
+    labels = permutation_power(labels, n)
+    indices = [ord(p) - ord('a') for p in programs]
+    return [chr(ord('a') + labels[indices[i]]) for i in positions]
+
 def parse_dance(dance_input):
     def parse_step(step_input):
         step, args = step_input[0], step_input[1:].split('/')
@@ -91,22 +122,8 @@ dance_steps = parse_dance(dance_input)
 dance(programs, dance_steps)
 print(f'Part 1: {"".join(programs)}')
 
-# Part 2, look for a cycle, where we see a dance order we've seen before.
-seen = set()
-count = 0
-programs = [chr(ord('a') + i) for i in range(programs_count)]
-while True:
-    dance(programs, dance_steps)
-    result = ''.join(programs)
-    if result in seen:
-        break
-    seen.add(result)
-    count += 1
-
-# Now we only need to perform the dance 1 billion mod the cycle count rather
-# than the full 1 billion times.
-dance_count = 1_000_000_000 % count
+# Part 2, raise the dance's position and label permutations to the billionth
+# power by repeated squaring.
 programs = [chr(ord('a') + i) for i in range(programs_count)]
-for _ in range(dance_count):
-    dance(programs, dance_steps)
+programs = dance_times(programs, dance_steps, 1_000_000_000)
 print(f'Part 2: {"".join(programs)}')
@@ -78,27 +78,47 @@
 
 ################################################################################
 
-buffer = [0]
-position = 0
-step = 370
-last_value = 2017
-
-for value in range(1, last_value + 1):
-    position = 1 + (position + step) % len(buffer)
-    buffer.insert(position, value)
+from array import array
+
+def value_after(step, last_value, target):
+    # Circular buffer stored as a successor array: next_value[v] is the
+    # value following v. Each insertion walks step % length links.
+    next_value = array('q', [0]) * (last_value + 1)
+    current = 0
+    for value in range(1, last_value + 1):
+        for _ in range(step % value):
+            current = next_value[current]
+        next_value[value] = next_value[current]
+        next_value[current] = value
+        current = value
+    return next_value[target]
+
+def value_after_zero(step, last_value):
+    # 0 never moves from index 0, so only insertions at index 1 matter,
+    # and those only happen when the position wraps. Without a wrap the
+    # position advances by exactly step + 1 per insertion, so runs of
+    # non-wrapping insertions are skipped in one go.
+    if step == 0:
+        # Every value lands straight after the previous one.
+        return 1 if last_value > 0 else None
+    position = 0
+    value = 1
+    result = None
+    while value <= last_value:
+        # value is the next value to insert, and also the buffer length.
+        room = value - position - step
+        if room > 0:
+            skip = min((room - 1) // step + 1, last_value - value + 1)
+            position += skip * (step + 1)
+            value += skip
+            continue
+        position = (position + step) % value + 1
+        if position == 1:
+            result = value
+        value += 1
+    return result
 
-print(f'Part 1: Item after 2017: {buffer[position + 1]}')
-
-buffer = [0, None]
-buffer_len = 1
-position = 0
 step = 370
-last_value = 50_000_000
-
-for value in range(1, last_value + 1):
-    position = 1 + (position + step) % buffer_len
-    if position == 1:
-        buffer[position] = value
-    buffer_len += 1
 
-print(f'Part 2: Item after 0: {buffer[1]}')
+print(f'Part 1: Item after 2017: {value_after(step, 2017, 2017)}')
+print(f'Part 2: Item after 0: {value_after_zero(step, 50_000_000)}')
@@ -130,101 +130,122 @@
 
 ################################################################################
 
-import asyncio
 import collections
 
-def run(registers, instructions):
-    def snd(x):
-        registers['snd'] = arg_value(x)
-    def set(x, y):
-        registers[x] = arg_value(y)
-    def add(x, y):
-        registers[x] += arg_value(y)
-    def mul(x, y):
-        registers[x] *= arg_value(y)
-    def mod(x, y):
-        registers[x] %= arg_value(y)
-    def rcv(x):
-        if arg_value(x) != 0:
-            registers['rcv'] = registers['snd']
-    def jgz(x, y):
-        if arg_value(x) > 0:
-            return arg_value(y)
-        else:
-            return None
-    def arg_value(x):
-        if len(x) == 1 and x.isalpha():
-            return registers[x]
-        else:
-            return int(x)
-
+SND, SET, ADD, MUL, MOD, RCV, JGZ = range(7)
+OPCODES = {
+    'snd': SND,
+    'set': SET,
+    'add': ADD,
+    'mul': MUL,
+    'mod': MOD,
+    'rcv': RCV,
+    'jgz': JGZ,
+}
+
+def compile_instructions(instructions):
+    # Each instruction becomes (opcode, x, x_is_register, y,
+    # y_is_register), where register operands are indices into a list
+    # of registers and the rest are already ints.
+    register_names = sorted({arg for _, args in instructions
+                             for arg in args if arg.isalpha()} | {'p'})
+    slots = {name: index for index, name in enumerate(register_names)}
+    def operand(arg):
+        if arg.isalpha():
+            return slots[arg], True
+        return int(arg), False
+    def compile_line(cmd, args):
+        x, x_reg = operand(args[0])
+        y, y_reg = operand(args[1]) if len(args) > 1 else (0, False)
+        return (OPCODES[cmd], x, x_reg, y, y_reg)
+    program = tuple(compile_line(cmd, args) for cmd, args in instructions)
+    return program, slots
+
+def run(program, slots):
+    registers = [0] * len(slots)
+    sound = None
     pc = 0
-    while pc < len(instructions):
-        cmd, args = instructions[pc]
-        operation = locals()[cmd]
-        jump = operation(*args)
-        if jump is not None:
-            pc += jump
-        else:
-            pc += 1
-        if registers['rcv'] != 0:
-            break
+    while 0 <= pc < len(program):
+        op, x, x_reg, y, y_reg = program[pc]
+        if y_reg:
+            y = registers[y]
+        if op == SET:
+            registers[x] = y
+        elif op == ADD:
+            registers[x] += y
+        elif op == MUL:
+            registers[x] *= y
+        elif op == MOD:
+            registers[x] %= y
+        elif op == JGZ:
+            if (registers[x] if x_reg else x) > 0:
+                pc += y
+                continue
+        elif op == SND:
+            sound = registers[x] if x_reg else x
+        elif op == RCV:
+            if (registers[x] if x_reg else x) != 0:
+                return sound
+        pc += 1
+    return None
 
-class Deadlock(Exception): pass
-        
 class DuetCPU:
-    def __init__(self, program_id):
+    def __init__(self, program_id, slots):
         self.program_id = program_id
-        self.registers = collections.defaultdict(lambda: 0)
-        self.registers['p'] = program_id
-        self.rcv_queue = asyncio.Queue()
-        self.rcv_waiting = False
+        self.registers = [0] * len(slots)
+        self.registers[slots['p']] = program_id
+        self.rcv_queue = collections.deque()
         self.snd_count = 0
 
-    @property
-    def is_blocking(self):
-        return self.rcv_waiting and self.rcv_queue.empty()
-
-    async def run(self, instructions, other_program):
-        async def snd(x):
-            self.snd_count += 1
-            other_program.rcv_queue.put_nowait(arg_value(x))
-        async def set(x, y):
-            self.registers[x] = arg_value(y)
-        async def add(x, y):
-            self.registers[x] += arg_value(y)
-        async def mul(x, y):
-            self.registers[x] *= arg_value(y)
-        async def mod(x, y):
-            self.registers[x] %= arg_value(y)
-        async def rcv(x):
-            self.rcv_waiting = True
-            if other_program.is_blocking and self.is_blocking:
-                other_program.rcv_queue.put_nowait(None)
-                raise Deadlock()
-            value = await self.rcv_queue.get()
-            if value is None:
-                raise Deadlock()
-            self.registers[x] = value
-            self.rcv_waiting = False
-        async def jgz(x, y):
-            return arg_value(y) if arg_value(x) > 0 else None
-        def arg_value(x):
-            return self.registers[x] if x.isalpha() else int(x)
-
+    def run(self, program, other_program):
+        # Generator that executes until rcv finds an empty queue, then
+        # yields to let the other program run.
+        registers = self.registers
+        rcv_queue = self.rcv_queue
+        snd_queue = other_program.rcv_queue
         pc = 0
-        while pc >= 0 and pc < len(instructions):
-            cmd, args = instructions[pc]
-            operation = locals()[cmd]
+        while 0 <= pc < len(program):
+            op, x, x_reg, y, y_reg = program[pc]
+            if y_reg:
+                y = registers[y]
+            if op == SET:
+                registers[x] = y
+            elif op == ADD:
+                registers[x] += y
+            elif op == MUL:
+                registers[x] *= y
+            elif op == MOD:
+                registers[x] %= y
+            elif op == JGZ:
+                if (registers[x] if x_reg else x) > 0:
+                    pc += y
+                    continue
+            elif op == SND:
+                snd_queue.append(registers[x] if x_reg else x)
+                self.snd_count += 1
+            elif op == RCV:
+                while not rcv_queue:
+                    yield
+                registers[x] = rcv_queue.popleft()
+            pc += 1
+
+def run_duet(program, slots):
+    cpus = [DuetCPU(0, slots), DuetCPU(1, slots)]
+    runners = [cpus[0].run(program, cpus[1]), cpus[1].run(program, cpus[0])]
+    blocked = [False, False]
+    while True:
+        progressed = False
+        for index, runner in enumerate(runners):
+            if runner is None or (blocked[index] and not cpus[index].rcv_queue):
+                continue
             try:
-                jump = await operation(*args)
-            except Deadlock:
-                break
-            if jump is not None:
-                pc += jump
-            else:
-                pc += 1
-        other_program.rcv_queue.put_nowait(None)
+                next(runner)
+                blocked[index] = True
+            except StopIteration:
+                runners[index] = None
+            progressed = True
+        if not progressed:
+            return cpus
 
 def parse_instructions(instructions_input):
     def parse_line(line):
@@ -235,15 +256,9 @@ def parse_instructions(instructions_input):
 with open('aoc18.txt', 'r') as f:
     instructions_input = f.read()
 instructions = parse_instructions(instructions_input)
-registers = collections.defaultdict(lambda: 0)
-run(registers, instructions)
-print(f'Part 1: Recovered frequency value {registers["rcv"]}')
-
+program, slots = compile_instructions(instructions)
+recovered = run(program, slots)
+print(f'Part 1: Recovered frequency value {recovered}')
 
-cpu0 = DuetCPU(0)
-cpu1 = DuetCPU(1)
-asyncio.get_event_loop().run_until_complete(asyncio.gather(
-    cpu0.run(instructions, cpu1),
-    cpu1.run(instructions, cpu0)
-))
+cpu0, cpu1 = run_duet(program, slots)
 print(f'Part 2: Program 0/1 sent {cpu0.snd_count}/{cpu1.snd_count} values.')
@@ -86,6 +86,9 @@
 ################################################################################
 
 import collections
+import itertools
+
+import numpy as np
 
 Point = collections.namedtuple('Point', [
     'x',
@@ -131,12 +134,99 @@ def parse_particles(particles_input):
     lines = particles_input.strip().splitlines()
     return [parse_particle(id, l) for id, l in enumerate(lines)]
 
+def particle_arrays(particles):
+    p = np.array([particle.p for particle in particles], dtype=np.int64).reshape(-1, 3)
+    v = np.array([particle.v for particle in particles], dtype=np.int64).reshape(-1, 3)
+    a = np.array([particle.a for particle in particles], dtype=np.int64).reshape(-1, 3)
+    return p, v, a
+
+def trajectory(p, v, a, remove_collisions=False):
+    # Yields (ids, positions) after every tick, for (N, 3) arrays.
+    ids = np.arange(len(p))
+    while True:
+        v = v + a
+        p = p + v
+        if remove_collisions and len(p) > 0:
+            _, inverse, counts = np.unique(p, axis=0, return_inverse=True, return_counts=True)
+            keep = counts[inverse.reshape(-1)] == 1
+            ids, p, v, a = ids[keep], p[keep], v[keep], a[keep]
+        yield ids, p
+
+def long_run_closest(particles):
+    # After enough ticks every coordinate keeps the sign of the first
+    # nonzero of its a, v, p, and the Manhattan distance becomes the
+    # polynomial sum(|a|) t^2 / 2 + sum(s v + |a| / 2) t + sum(s p). Comparing
+    # its coefficients in order picks the particle that stays closest.
+    def key(particle):
+        signs = [(a > 0) - (a < 0) or (v > 0) - (v < 0) or (p > 0) - (p < 0)
+                 for p, v, a in zip(particle.p, particle.v, particle.a)]
+        return (sum(map(abs, particle.a)),
+                sum(s * v for s, v in zip(signs, particle.v)),
+                sum(s * p for s, p in zip(signs, particle.p)))
+    return min(particles, key=key)
+
+def collision_times(p, v, a, min_time=1):
+    # Twice a position after t ticks is 2p + (2v + a) t + a t^2, so two
+    # particles meet at integer roots t of A t^2 + B t + C on every axis,
+    # with A, B, C taken from their differences. Roots come from the
+    # first axis that is not identically zero and are then checked on
+    # all three. Returns (times, i, j) arrays of each pair's first hit.
+    times, firsts, seconds = [], [], []
+    for i in range(len(p) - 1):
+        A = a[i + 1:] - a[i]
+        B = 2 * (v[i + 1:] - v[i]) + A
+        C = 2 * (p[i + 1:] - p[i])
+        always = (A == 0) & (B == 0) & (C == 0)
+        axis = np.argmax(~always, axis=1)[:, None]
+        a0 = np.take_along_axis(A, axis, axis=1)[:, 0]
+        b0 = np.take_along_axis(B, axis, axis=1)[:, 0]
+        c0 = np.take_along_axis(C, axis, axis=1)[:, 0]
+
+        discriminant = b0 * b0 - 4 * a0 * c0
+        root = np.sqrt(np.maximum(discriminant, 0).astype(float)).round().astype(np.int64)
+        quadratic = (a0 != 0) & (discriminant >= 0) & (root * root == discriminant)
+        divisor = np.where(a0 != 0, 2 * a0, np.where(b0 != 0, b0, 1))
+        candidates = [np.where(a0 != 0, -b0 - root, -c0), np.where(a0 != 0, -b0 + root, -c0)]
+        valid_shape = quadratic | ((a0 == 0) & (b0 != 0))
+
+        best = np.full(len(A), -1, dtype=np.int64)
+        for numerator in candidates:
+            t = numerator // divisor
+            ok = valid_shape & (numerator % divisor == 0) & (t >= min_time)
+            t = np.where(ok, t, min_time)[:, None]
+            ok &= np.all(A * t * t + B * t + C == 0, axis=1)
+            best = np.where(ok & ((best < 0) | (t[:, 0] < best)), t[:, 0], best)
+        best = np.where(np.all(always, axis=1), min_time, best)
+
+        (hits,) = np.nonzero(best >= 0)
+        times.append(best[hits])
+        firsts.append(np.full(len(hits), i))
+        seconds.append(hits + i + 1)
+    if not times:
+        return (np.empty(0, dtype=np.int64),) * 3
+    return np.concatenate(times), np.concatenate(firsts), np.concatenate(seconds)
+
+def collision_survivors(particles):
+    # Replays pair collisions in time order. A pair only collides if
+    # neither particle was destroyed at an earlier time.
+    p, v, a = particle_arrays(particles)
+    times, firsts, seconds = collision_times(p, v, a)
+    order = np.argsort(times, kind='stable')
+    destroyed = set()
+    for _, group in itertools.groupby(order.tolist(), key=lambda k: times[k]):
+        hits = set()
+        for k in group:
+            i, j = int(firsts[k]), int(seconds[k])
+            if i not in destroyed and j not in destroyed:
+                hits.update((i, j))
+        destroyed |= hits
+    return [particle for particle in particles if particle.id not in destroyed]
+
 with open('aoc20.txt', 'r') as f:
     particles_input = f.read()
 particles = parse_particles(particles_input)
-particles1 = simulate(particles, ticks=1000, remove_collisions=False)
-closest_particle = min(particles1, key=Particle.distance)
+closest_particle = long_run_closest(particles)
 print(f'Part 1: Closest particle to (0,0,0) is {closest_particle.id}.')
 
-particles2 = simulate(particles, ticks=1000, remove_collisions=True)
+particles2 = collision_survivors(particles)
 print(f'Part 2: {len(particles2)} particles left after removing collisions.')
@@ -111,6 +111,10 @@
 
 ################################################################################
 
+import collections
+
+import numpy as np
+
 OFF = '.'
 ON = '#'
 
@@ -247,23 +251,101 @@ def parse_pattern(pattern_input_str):
         pattern_input_str.split(' => '))
     return pattern_input, pattern_output
 
+def image_pixels(image):
+    return np.array([[image.get(x, y) == ON for x in range(image.size)]
+                     for y in range(image.size)])
+
+def block_weights(size):
+    return 1 << np.arange(size * size)
+
+def block_keys(blocks):
+    # Packs each size x size block in the trailing two axes into a
+    # bitmask, row-major with the top-left pixel as bit 0.
+    size = blocks.shape[-1]
+    flat = blocks.reshape(blocks.shape[:-2] + (size * size,))
+    return flat.astype(np.int64) @ block_weights(size)
+
+def pattern_lookups(patterns_list):
+    # Maps block size to a dense (2 ** (size * size), size + 1, size + 1)
+    # array holding the output block for every possible input key.
+    lookups = {
+        size: np.zeros((1 << (size * size), size + 1, size + 1), dtype=bool)
+        for size in (2, 3)
+    }
+    for input_pattern, output_pattern in patterns_list:
+        input_pixels = image_pixels(input_pattern)
+        output_pixels = image_pixels(output_pattern)
+        for n in range(4):
+            rotated = np.rot90(input_pixels, n)
+            for variant in (rotated, np.fliplr(rotated)):
+                lookups[len(variant)][block_keys(variant)] = output_pixels
+    return lookups
+
+def enhanced_pixels(pixels, lookups):
+    size = len(pixels)
+    block_size = 2 if size % 2 == 0 else 3
+    blocks_count = size // block_size
+    blocks = pixels.reshape(blocks_count, block_size, blocks_count, block_size)
+    keys = block_keys(blocks.transpose(0, 2, 1, 3))
+    outputs = lookups[block_size][keys]
+    dst_size = blocks_count * (block_size + 1)
+    return outputs.transpose(0, 2, 1, 3).reshape(dst_size, dst_size)
+
+def split_blocks(pixels, block_size):
+    blocks_count = len(pixels) // block_size
+    blocks = pixels.reshape(blocks_count, block_size, blocks_count, block_size)
+    return blocks.transpose(0, 2, 1, 3).reshape(-1, block_size, block_size)
+
+def count_pixels(pixels, lookups, iterations):
+    # Once the size is an odd multiple of 3 the image is enhanced as
+    # independent 3x3 blocks, and three steps later (3 -> 4 -> 6 -> 9) it
+    # is an odd multiple of 3 again. So a 3x3 block's future depends
+    # only on the block itself: track a multiset of block keys and
+    # expand each distinct key once.
+    while iterations > 0 and (len(pixels) % 3 != 0 or len(pixels) % 2 == 0):
+        pixels = enhanced_pixels(pixels, lookups)
+        iterations -= 1
+    if iterations == 0:
+        return int(np.count_nonzero(pixels))
+    keys = collections.Counter(block_keys(split_blocks(pixels, 3)).tolist())
+
+    def block_pixels(key):
+        return ((key >> np.arange(9)) & 1).astype(bool).reshape(3, 3)
+
+    children = {}
+    def block_children(key):
+        if key not in children:
+            pixels = block_pixels(key)
+            for _ in range(3):
+                pixels = enhanced_pixels(pixels, lookups)
+            children[key] = block_keys(split_blocks(pixels, 3)).tolist()
+        return children[key]
+
+    while iterations >= 3:
+        next_keys = collections.Counter()
+        for key, count in keys.items():
+            for child in block_children(key):
+                next_keys[child] += count
+        keys = next_keys
+        iterations -= 3
+
+    total = 0
+    for key, count in keys.items():
+        pixels = block_pixels(key)
+        for _ in range(iterations):
+            pixels = enhanced_pixels(pixels, lookups)
+        total += count * int(np.count_nonzero(pixels))
+    return total
+
 start_image = parse_image('.#.\n..#\n###')
 with open('aoc21.txt', 'r') as f:
     patterns_list = [parse_pattern(l) for l in f.read().strip().splitlines()]
-    patterns = {}
-    for input_pattern, output_pattern in patterns_list:
-        for n in range(4):
-            rotated = input_pattern.rotated(n)
-            patterns[f'{rotated}'] = output_pattern
-            patterns[f'{rotated.horizontally_flipped()}'] = output_pattern
-            patterns[f'{rotated.vertically_flipped()}'] = output_pattern
+    lookups = pattern_lookups(patterns_list)
 
-image = start_image
+pixels = image_pixels(start_image)
 for _ in range(5):
-    image = image.enhanced(patterns)
-print(f'Part 1: There are {image.pixels_count()} pixels on.')
+    pixels = enhanced_pixels(pixels, lookups)
+print(f'Part 1: There are {np.count_nonzero(pixels)} pixels on.')
 
-image = start_image
-for n in range(18):
-    image = image.enhanced(patterns)
-print(f'Part 2: There are {image.pixels_count()} pixels on.')
+pixels_count = count_pixels(image_pixels(start_image), lookups, 18)
+print(f'Part 2: There are {pixels_count} pixels on.')
@@ -234,52 +234,145 @@
 
 ################################################################################
 
-import collections
 import enum
 
-class Node(enum.Enum):
+class Node(enum.IntEnum):
     clean = 0
     weakened = 1
     infected = 2
     flagged = 3
 
-class Direction(enum.Enum):
-    up = 0
-    right = 1
-    down = 2
-    left = 3
-
-    @property
-    def turned_right(self):
-        return Direction((self.value + 1) % 4)
-
-    @property
-    def turned_left(self):
-        return Direction((self.value - 1) % 4)
-
-    @property
-    def reversed(self):
-        return self.turned_right.turned_right
-
-Point = collections.namedtuple('Point', [
-    'x',
-    'y',
-])
-def moved(self, direction):
-    if direction is Direction.up:
-        return Point(self.x, self.y - 1)
-    elif direction is Direction.down:
-        return Point(self.x, self.y + 1)
-    elif direction is Direction.left:
-        return Point(self.x - 1, self.y)
-    elif direction is Direction.right:
-        return Point(self.x + 1, self.y)
-Point.moved = moved
+# Directions are plain ints so turning is arithmetic mod 4.
+UP, RIGHT, DOWN, LEFT = range(4)
+DX = (0, 1, 0, -1)
+DY = (-1, 0, 1, 0)
+
+# Rule tables indexed by the current node: the node it becomes and how
+# far the carrier turns (1 = right, 2 = reverse, 3 = left).
+NEXT1 = (Node.infected, Node.infected, Node.clean, Node.infected)
+TURN1 = (3, 3, 1, 3)
+NEXT2 = (Node.weakened, Node.infected, Node.flagged, Node.clean)
+TURN2 = (3, 0, 1, 2)
 
 class Carrier:
-    def __init__(self, direction=Direction.up, position=Point(0, 0)):
+    def __init__(self, direction=UP, x=0, y=0):
         self.direction = direction
-        self.position = position
+        self.x = x
+        self.y = y
+
+class FlatGrid:
+    # Row-major bytearray covering [left, left + width) x [top, top +
+    # height). It doubles in both dimensions when the carrier leaves it.
+    def __init__(self, nodes):
+        self.height = len(nodes)
+        self.width = len(nodes[0])
+        self.left = -(self.width // 2)
+        self.top = -(self.height // 2)
+        self.cells = bytearray(b''.join(bytes(row) for row in nodes))
+
+    def bounds(self):
+        return (range(self.left, self.left + self.width),
+                range(self.top, self.top + self.height))
+
+    def __getitem__(self, point):
+        x, y = point
+        xs, ys = self.bounds()
+        if x not in xs or y not in ys:
+            return Node.clean
+        return Node(self.cells[(y - self.top) * self.width + x - self.left])
+
+    def grow(self):
+        width, height = self.width * 2 + 2, self.height * 2 + 2
+        dx, dy = (width - self.width) // 2, (height - self.height) // 2
+        cells = bytearray(width * height)
+        for row in range(self.height):
+            start = (row + dy) * width + dx
+            cells[start:start + self.width] = self.cells[row * self.width:(row + 1) * self.width]
+        self.cells = cells
+        self.width, self.height = width, height
+        self.left -= dx
+        self.top -= dy
+
+    def run(self, carrier, bursts, next_state, turn):
+        infections = 0
+        x, y, direction = carrier.x, carrier.y, carrier.direction
+        while bursts > 0:
+            xs, ys = self.bounds()
+            if x not in xs or y not in ys:
+                self.grow()
+                xs, ys = self.bounds()
+            cells, width = self.cells, self.width
+            left, right, top, bottom = xs.start, xs.stop, ys.start, ys.stop
+            delta = (-width, 1, width, -1)
+            index = (y - top) * width + x - left
+            while bursts > 0 and left <= x < right and top <= y < bottom:
+                node = cells[index]
+                state = next_state[node]
+                cells[index] = state
+                if state == 2:
+                    infections += 1
+                direction = (direction + turn[node]) & 3
+                x += DX[direction]
+                y += DY[direction]
+                index += delta[direction]
+                bursts -= 1
+        carrier.x, carrier.y, carrier.direction = x, y, direction
+        return infections
+
+class DictGrid:
+    # Sparse alternative keyed by x * STRIDE + y, for walks that wander
+    # far from the origin without visiting much of the area in between.
+    STRIDE = 1 << 32
+
+    @classmethod
+    def pack(cls, x, y):
+        return x * cls.STRIDE + y
+
+    @classmethod
+    def unpack(cls, key):
+        # y may be negative, so round x to the nearest multiple of STRIDE.
+        x = (key + cls.STRIDE // 2) // cls.STRIDE
+        return x, key - x * cls.STRIDE
+
+    def __init__(self, nodes):
+        # Only nodes that aren't clean are stored.
+        self.cells = {}
+        top, left = -(len(nodes) // 2), -(len(nodes[0]) // 2)
+        for y, row in enumerate(nodes, top):
+            for x, node in enumerate(row, left):
+                if node:
+                    self.cells[self.pack(x, y)] = node
+        self.corners = [(left, top), (left + len(nodes[0]) - 1, top + len(nodes) - 1)]
+
+    def bounds(self):
+        # Always covers the initial grid, like FlatGrid.
+        points = [self.unpack(key) for key in self.cells] + self.corners
+        xs, ys = zip(*points)
+        return range(min(xs), max(xs) + 1), range(min(ys), max(ys) + 1)
+
+    def __getitem__(self, point):
+        return Node(self.cells.get(self.pack(*point), 0))
+
+    def run(self, carrier, bursts, next_state, turn):
+        infections = 0
+        cells = self.cells
+        delta = (-1, self.STRIDE, 1, -self.STRIDE)
+        direction = carrier.direction
+        key = self.pack(carrier.x, carrier.y)
+        for _ in range(bursts):
+            node = cells.get(key, 0)
+            state = next_state[node]
+            if state:
+                cells[key] = state
+                if state == 2:
+                    infections += 1
+            else:
+                cells.pop(key, None)
+            direction = (direction + turn[node]) & 3
+            key += delta[direction]
+        carrier.x, carrier.y = self.unpack(key)
+        carrier.direction = direction
+        return infections
 
 def parse_nodes(nodes_input):
     def parse_character(character):
@@ -288,65 +381,13 @@ def parse_nodes(nodes_input):
         return [parse_character(c) for c in line]
     return [parse_line(l) for l in nodes_input.strip().splitlines()]
 
-def expand(nodes, carrier):
-    size = len(nodes)
-    rng = range(0, size)
-    if carrier.position.x in rng and carrier.position.y in rng:
-        return
-    size += 4
-    for row in nodes:
-        row.insert(0, Node.clean)
-        row.insert(0, Node.clean)
-        row.append(Node.clean)
-        row.append(Node.clean)
-    nodes.insert(0, [Node.clean] * size)
-    nodes.insert(0, [Node.clean] * size)
-    nodes.append([Node.clean] * size)
-    nodes.append([Node.clean] * size)
-    carrier.position = Point(
-        carrier.position.x + 2,
-        carrier.position.y + 2)
-
-def burst1(nodes, carrier):
-    direction, position = carrier.direction, carrier.position
-    node = nodes[position.y][position.x]
-    if node is Node.infected:
-        direction = direction.turned_right
-        node = Node.clean
-        caused_infection = False
-    else:
-        direction = direction.turned_left
-        node = Node.infected
-        caused_infection = True
-    nodes[position.y][position.x] = node
-    carrier.position = position.moved(direction)
-    carrier.direction = direction
-    expand(nodes, carrier)
-    return caused_infection
-
-def burst2(nodes, carrier):
-    caused_infection = False
-    direction, position = carrier.direction, carrier.position
-    node = nodes[position.y][position.x]
-    if node is Node.clean:
-        direction = direction.turned_left
-        node = Node.weakened
-    elif node is Node.infected:
-        direction = direction.turned_right
-        node = Node.flagged
-    elif node is Node.flagged:
-        direction = direction.reversed
-        node = Node.clean
-    elif node is Node.weakened:
-        node = Node.infected
-        caused_infection = True
-    nodes[position.y][position.x] = node
-    carrier.position = position.moved(direction)
-    carrier.direction = direction
-    expand(nodes, carrier)
-    return caused_infection
-
-def description(nodes, carrier):
+def burst1(grid, carrier):
+    return grid.run(carrier, 1, NEXT1, TURN1) == 1
+
+def burst2(grid, carrier):
+    return grid.run(carrier, 1, NEXT2, TURN2) == 1
+
+def description(grid, carrier):
     def describe_node(node, x, y):
         if node is Node.clean:
             char = '.'
@@ -356,16 +397,13 @@ def description(nodes, carrier):
             char = 'W'
         elif node is Node.flagged:
             char = 'F'
-        if carrier.position.x == x and carrier.position.y == y:
+        if carrier.x == x and carrier.y == y:
             return f'[{char}]'
         else:
             return f' {char} '
-    result = ''
-    for y, row in enumerate(nodes):
-        for x, node in enumerate(row):
-            result += describe_node(node, x, y)
-        result += '\n'
-    return result
+    xs, ys = grid.bounds()
+    return ''.join(''.join(describe_node(grid[x, y], x, y) for x in xs) + '\n'
+                   for y in ys)
     
 nodes_input = '''..#
 #..
@@ -374,20 +412,10 @@ nodes_input = '''..#
 with open('aoc22.txt', 'r') as f:
     nodes_input = f.read()
 
-nodes = parse_nodes(nodes_input)
-nodes_initial_size = len(nodes)
-carrier = Carrier(position=Point(nodes_initial_size // 2, nodes_initial_size // 2))
-infecting_bursts = 0
-for _ in range(10000):
-    if burst1(nodes, carrier):
-        infecting_bursts += 1
+grid = FlatGrid(parse_nodes(nodes_input))
+infecting_bursts = grid.run(Carrier(), 10000, NEXT1, TURN1)
 print(f'Part 1: There were {infecting_bursts} infecting bursts.')
 
-nodes = parse_nodes(nodes_input)
-nodes_initial_size = len(nodes)
-carrier = Carrier(position=Point(nodes_initial_size // 2, nodes_initial_size // 2))
-infecting_bursts = 0
-for _ in range(10000000):
-    if burst2(nodes, carrier):
-        infecting_bursts += 1
+grid = FlatGrid(parse_nodes(nodes_input))
+infecting_bursts = grid.run(Carrier(), 10000000, NEXT2, TURN2)
 print(f'Part 2: There were {infecting_bursts} infecting bursts.')
@@ -51,6 +51,7 @@
 
 ################################################################################
 
+import builtins
 import collections
 import math
 import re
@@ -74,22 +75,219 @@ def value(registers, x):
     else:
         return int(x)
 
-def execute(instructions, debug=False):
-    registers = collections.defaultdict(lambda: 0)
-    counts = collections.defaultdict(lambda: 0)
+SET, SUB, MUL, JNZ, CALL = range(5)
+OPCODES = {
+    set: SET,
+    sub: SUB,
+    mul: MUL,
+    jnz: JNZ,
+}
+OPCODE_NAMES = ['set', 'sub', 'mul', 'jnz', 'call']
+
+Profile = collections.namedtuple('Profile', [
+    'addresses',
+    'opcodes',
+])
+
+def compile_instructions(instructions):
+    # Each instruction becomes (opcode, x, x_is_register, y,
+    # y_is_register) with registers as indices into a list. Native ops
+    # from optimize() become (CALL, function, False, arguments, False).
+    register_names = sorted({arg for _, args in instructions
+                             for arg in args if arg.isalpha()} | {'a'})
+    slots = {name: index for index, name in enumerate(register_names)}
+    def operand(arg):
+        if arg.isalpha():
+            return slots[arg], True
+        return int(arg), False
+    def compile_line(operation, args):
+        if operation not in OPCODES:
+            arguments = tuple(slots[arg] if arg.isalpha() else int(arg) for arg in args)
+            return (CALL, operation, False, arguments, False)
+        return (OPCODES[operation], *operand(args[0]), *operand(args[1]))
+    program = tuple(compile_line(operation, args) for operation, args in instructions)
+    return program, slots
+
+def run(program, registers):
     pc = 0
-    if debug:
-        registers['a'] = 1
-    while pc >= 0 and pc < len(instructions):
-        operation, args = instructions[pc]
-        jump = operation(registers, *args)
-        if jump is not None:
-            pc += jump
+    while 0 <= pc < len(program):
+        op, x, x_reg, y, y_reg = program[pc]
+        if y_reg:
+            y = registers[y]
+        if op == SET:
+            registers[x] = y
+        elif op == SUB:
+            registers[x] -= y
+        elif op == MUL:
+            registers[x] *= y
+        elif op == JNZ:
+            if (registers[x] if x_reg else x) != 0:
+                pc += y
+                continue
+        else:
+            jump = x(registers, *y)
+            if jump is not None:
+                pc += jump
+                continue
+        pc += 1
+
+def run_profiled(program, registers, hits):
+    # Same as run, but counts the executions of every address in hits.
+    pc = 0
+    while 0 <= pc < len(program):
+        hits[pc] += 1
+        op, x, x_reg, y, y_reg = program[pc]
+        if y_reg:
+            y = registers[y]
+        if op == SET:
+            registers[x] = y
+        elif op == SUB:
+            registers[x] -= y
+        elif op == MUL:
+            registers[x] *= y
+        elif op == JNZ:
+            if (registers[x] if x_reg else x) != 0:
+                pc += y
+                continue
         else:
-            pc += 1
-        if not debug:
-            counts[operation] += 1
-    return registers, counts
+            jump = x(registers, *y)
+            if jump is not None:
+                pc += jump
+                continue
+        pc += 1
+
+def execute(instructions, debug=False, profile=False):
+    program, slots = compile_instructions(instructions)
+    registers = [0] * len(slots)
+    if debug:
+        registers[slots['a']] = 1
+    result = None
+    if profile:
+        hits = [0] * len(program)
+        run_profiled(program, registers, hits)
+        opcodes = collections.Counter()
+        for (op, *_), count in zip(program, hits):
+            opcodes[OPCODE_NAMES[op]] += count
+        result = Profile(hits, opcodes)
+    else:
+        run(program, registers)
+    named = collections.defaultdict(lambda: 0)
+    named.update((name, registers[slot]) for name, slot in slots.items())
+    return named, result
+
+def hot_loops(instructions, profile):
+    # Backward jumps mark loops; rank them by how often the loop head ran.
+    loops = []
+    for pc, (operation, args) in enumerate(instructions):
+        if operation is jnz and not args[1].isalpha() and int(args[1]) < 0:
+            head = pc + int(args[1])
+            loops.append((profile.addresses[head], head, pc))
+    return sorted(loops, reverse=True)
+
+# Idioms the optimizer replaces. Capital letters stand for registers,
+# which must all be distinct; everything else has to match exactly.
+
+# F = 0 if D * E == B for some E in [2, B).
+DIVISOR_LOOP = '''
+set E 2
+set G D
+mul G E
+sub G B
+jnz G 2
+set F 0
+sub E -1
+set G E
+sub G B
+jnz G -8
+'''
+
+# F = 0 if D * E == B for some D, E in [2, B), i.e. B is composite.
+COMPOSITE_LOOP = '''
+set D 2''' + DIVISOR_LOOP + '''sub D -1
+set G D
+sub G B
+jnz G -13
+'''
+
+def divisor_loop(registers, f, b, d, e, g, length):
+    n = registers[b]
+    if n < 3:
+        # The loop never reaches E == B; run the original code.
+        return set(registers, e, '2')
+    divisor = registers[d]
+    if divisor != 0 and n % divisor == 0 and 2 <= n // divisor < n:
+        registers[f] = 0
+    registers[e] = n
+    registers[g] = 0
+    return int(length)
+
+def composite_loop(registers, f, b, d, e, g, length):
+    n = registers[b]
+    if n < 3:
+        return set(registers, d, '2')
+    if any(n % divisor == 0 for divisor in range(2, math.isqrt(n) + 1)):
+        registers[f] = 0
+    registers[d] = n
+    registers[e] = n
+    registers[g] = 0
+    return int(length)
+
+IDIOMS = [
+    (COMPOSITE_LOOP, composite_loop),
+    (DIVISOR_LOOP, divisor_loop),
+]
+
+def match_idiom(instructions, start, idiom):
+    lines = idiom.strip().splitlines()
+    if start + len(lines) > len(instructions):
+        return None
+    bindings = {}
+    for line, (operation, args) in zip(lines, instructions[start:]):
+        cmd, *pattern = line.split(' ')
+        if operation.__name__ != cmd or len(args) != len(pattern):
+            return None
+        for expected, arg in zip(pattern, args):
+            if expected.isupper():
+                if not arg.isalpha() or bindings.setdefault(expected, arg) != arg:
+                    return None
+            elif expected != arg:
+                return None
+    if len(bindings.values()) != len(builtins.set(bindings.values())):
+        return None
+    return bindings, len(lines)
+
+def optimize(instructions):
+    # Replaces the first instruction of each recognised idiom with a
+    # native equivalent that jumps past it. The rest of the block stays
+    # in place, so addresses don't move and the native version can fall
+    # back to the original code. A block is only replaced if nothing
+    # outside it jumps into its middle, which needs every jump offset to
+    # be a constant.
+    targets = []
+    for pc, (operation, args) in enumerate(instructions):
+        if operation is jnz:
+            if args[1].isalpha():
+                return instructions
+            targets.append((pc, pc + int(args[1])))
+
+    optimized = list(instructions)
+    pc = 0
+    while pc < len(instructions):
+        for idiom, native in IDIOMS:
+            match = match_idiom(instructions, pc, idiom)
+            if match is None:
+                continue
+            bindings, length = match
+            end = pc + length
+            if any(not pc <= source < end and pc < target < end
+                   for source, target in targets):
+                continue
+            registers = [bindings[r] for r in 'FBDEG']
+            optimized[pc] = (native, registers + [str(length)])
+            pc = end - 1
+            break
+        pc += 1
+    return optimized
 
 def parse_instructions(instructions_input):
     def parse_line(line):
@@ -102,16 +300,11 @@ with open('aoc23.txt', 'r') as f:
     instructions_input = f.read()
 instructions = parse_instructions(instructions_input)
 
-registers, counts = execute(instructions)
-print(f'Part 1: The mul instruction was executed {counts[mul]} times.')
-
-# Part 2, the given input program is counting the number of values b that have
-# any integer factor >= 2. The value b is every 17 numbers in the range
-# [108100, 125100]. We can implement this algorithm more directly in Python.
-h = 0
-for b in range(108100, 125101, 17):
-    for d in range(2, int(math.sqrt(b))):
-        if b % d == 0:
-            h += 1
-            break
-print(f'Part 2: The value of register h is {h}.')
+registers, profile = execute(instructions, profile=True)
+print(f'Part 1: The mul instruction was executed {profile.opcodes["mul"]} times.')
+
+# Part 2, the program counts the composite numbers among every 17th value of b
+# using a doubly nested trial multiplication loop, which optimize() replaces
+# with a native primality check.
+registers, _ = execute(optimize(instructions), debug=True)
+print(f'Part 2: The value of register h is {registers["h"]}.')
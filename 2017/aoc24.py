@@ -73,30 +73,54 @@
 
 ################################################################################
 
-def find_bridges(ports, bridge=[], results=set()):
-    if len(bridge) > 0:
-        previous_port = bridge[-1][1]
-    else:
-        previous_port = 0
-    matching_ports = [p for p in ports if previous_port in p]
-
-    if len(matching_ports) == 0:
-        results.add(tuple(bridge))
-    else:
-        for matching_port in matching_ports:
-            next_ports = ports[:]
-            next_ports.remove(matching_port)
-
-            if matching_port[0] != previous_port:
-                matching_port = tuple(reversed(matching_port))
-            next_bridge = bridge + [matching_port]
-
-            find_bridges(next_ports, next_bridge, results)
-
-    return results
-
-def strength(bridge):
-    return sum(map(sum, bridge))
+def bridge_stats(ports):
+    # Returns (strongest, longest, strength of the strongest longest)
+    # over every bridge that can be built from `ports`. Used components
+    # are bits in an int, so a search state is just (open port, used),
+    # and each state's best extension is memoized.
+    by_port = {}
+    doubles = {}
+    for index, (a, b) in enumerate(ports):
+        by_port.setdefault(a, []).append((index, b))
+        if a != b:
+            by_port.setdefault(b, []).append((index, a))
+        else:
+            doubles[a] = index
+
+    def moves(port, used):
+        # (strength added, next state) for each component that fits.
+        double = doubles.get(port)
+        if double is not None and not used & (1 << double):
+            # A double never changes the open port, so laying it down
+            # right away is never worse than any alternative.
+            return [(2 * port, (port, used | (1 << double)))]
+        return [(port + other, (other, used | (1 << index)))
+                for index, other in by_port.get(port, ())
+                if not used & (1 << index)]
+
+    # Depth-first with an explicit stack: a state stays on the stack
+    # until every state it leads to is memoized, then is resolved from
+    # them, so long bridges don't recurse.
+    memo = {}
+    stack = [(0, 0)]
+    while stack:
+        state = stack[-1]
+        if state in memo:
+            stack.pop()
+            continue
+        next_moves = moves(*state)
+        pending = [next_state for _, next_state in next_moves if next_state not in memo]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        strongest, longest = 0, (0, 0)
+        for weight, next_state in next_moves:
+            next_strongest, next_length, next_strength = memo[next_state]
+            strongest = max(strongest, next_strongest + weight)
+            longest = max(longest, (next_length + 1, next_strength + weight))
+        memo[state] = (strongest, *longest)
+    return memo[(0, 0)]
 
 def parse_ports(ports):
     def parse_line(line):
@@ -106,19 +130,6 @@ def parse_ports(ports):
 with open('aoc24.txt', 'r') as f:
     ports_input = f.read()
 ports = parse_ports(ports_input)
-bridges = find_bridges(ports)
-
-max_strength = max(map(strength, bridges))
+max_strength, _, longest_strength = bridge_stats(ports)
 print(f'Part 1: The strongest bridge is {max_strength} units.')
-
-strongest = None
-for bridge in bridges:
-    bridge_strength = strength(bridge)
-    if strongest is None:
-        strongest = bridge
-    elif len(bridge) > len(strongest):
-        strongest = bridge
-    elif len(bridge) == len(strongest) and strength(bridge) > strength(strongest):
-        strongest = bridge
-max_strength = strength(strongest)
-print(f'Part 2: The strongest longest bridge is {max_strength} units.')
+print(f'Part 2: The strongest longest bridge is {longest_strength} units.')
@@ -148,19 +148,146 @@ def parse_blueprint(blueprint_input):
 
     return Blueprint(start_state, step_count, states)
 
-def execute(blueprint):
-    tape = collections.defaultdict(lambda: 0)
-    cursor = 0
-    state = blueprint.states[blueprint.start_state]
-    for _ in range(blueprint.step_count):
-        rule = state[tape[cursor]]
-        tape[cursor] = rule.write
-        cursor += rule.direction
-        state = blueprint.states[rule.next_state]
+Program = collections.namedtuple('Program', [
+    'start_state',
+    'step_count',
+    'write',
+    'move',
+    'next_state',
+    'sweeps',
+])
+
+def compile_blueprint(blueprint):
+    # States become ints and rules live in flat tables indexed by
+    # state * 2 + value. A sweep is a cycle of states that each read
+    # `value`, move the same way and hand over to the next, so over a run
+    # of `value` cells the machine just cycles through them writing a
+    # fixed pattern.
+    names = sorted(blueprint.states)
+    ids = {name: index for index, name in enumerate(names)}
+    write, move, next_state = [], [], []
+    for name in names:
+        for rule in blueprint.states[name]:
+            write.append(rule.write)
+            move.append(rule.direction)
+            next_state.append(ids[rule.next_state])
+
+    sweeps = []
+    for state in range(len(names)):
+        for value in (0, 1):
+            cycle = [state]
+            direction = move[state * 2 + value]
+            while len(cycle) <= len(names):
+                rule = cycle[-1] * 2 + value
+                if move[rule] != direction:
+                    break
+                if next_state[rule] == state:
+                    break
+                cycle.append(next_state[rule])
+            rule = cycle[-1] * 2 + value
+            if move[rule] == direction and next_state[rule] == state:
+                writes = [write[s * 2 + value] for s in cycle]
+                sweeps.append((cycle, writes, direction))
+            else:
+                sweeps.append(None)
+
+    return Program(ids[blueprint.start_state], blueprint.step_count,
+                   write, move, next_state, sweeps)
+
+def run_length(tape, cursor, value, direction):
+    # Number of cells equal to value starting at cursor and heading in
+    # direction, stopping at the end of the tape.
+    other = 1 - value
+    if direction > 0:
+        end = tape.find(other, cursor)
+        return (len(tape) if end < 0 else end) - cursor
+    else:
+        return cursor - tape.rfind(other, 0, cursor + 1)
+
+def apply_sweep(tape, cursor, state, steps, sweep):
+    # Runs a sweep over the run of equal cells at cursor, returning the
+    # new cursor, state and number of steps taken.
+    cycle, writes, direction = sweep
+    length = min(run_length(tape, cursor, tape[cursor], direction), steps)
+    offset = cycle.index(state)
+    period = len(cycle)
+    if direction > 0:
+        low, high = cursor, cursor + length
+    else:
+        low, high = cursor - length + 1, cursor + 1
+    for phase in range(period):
+        # Cell cursor + direction * j is written by cycle[(offset + j) % period].
+        first = cursor + direction * phase
+        if direction < 0:
+            first = low + (first - low) % period
+        count = len(range(first, high, period))
+        tape[first:high:period] = bytes([writes[(offset + phase) % period]]) * count
+    return cursor + direction * length, cycle[(offset + length) % period], length
+
+FUSE_MIN = 16
+
+def probe_tables(program):
+    # Within a sweep the run ahead only gets shorter, so it is only worth
+    # checking for one when the machine enters a sweep. States are
+    # extended with a mark of 0, or 1 + value if the last rule was a
+    # sweep over `value`, and rules continuing that sweep never probe.
+    write, move, next_state, runs = [], [], [], []
+    for state in range(len(program.sweeps) // 2):
+        for mark in range(3):
+            for value in (0, 1):
+                rule = state * 2 + value
+                swept = program.sweeps[rule] is not None
+                write.append(program.write[rule])
+                move.append(program.move[rule])
+                next_state.append(program.next_state[rule] * 3 + (1 + value if swept else 0))
+                entering = swept and mark != 1 + value
+                runs.append(bytes([value]) * FUSE_MIN if entering else None)
+    return write, move, next_state, runs
+
+def execute(blueprint, tape_size=1 << 12):
+    program = compile_blueprint(blueprint)
+    # Handing a run to apply_sweep only pays off for long runs, so only
+    # do it when at least FUSE_MIN matching cells lie ahead.
+    write, move, next_state, runs = probe_tables(program)
+    tape = bytearray(tape_size)
+    size = tape_size
+    cursor = size // 2
+    state = program.start_state * 3
+    steps = program.step_count
+    while steps > 0:
+        margin = min(cursor, size - 1 - cursor) - FUSE_MIN
+        if margin < 1:
+            # Double the tape, keeping the old contents in the middle.
+            shift = size // 2
+            tape = bytearray(shift) + tape + bytearray(shift)
+            size = len(tape)
+            cursor += shift
+            continue
+        # The cursor moves one cell per step, so neither it nor a run
+        # check can leave the tape in the next `margin` steps.
+        chunk = min(steps, margin)
+        for taken in range(chunk):
+            value = tape[cursor]
+            rule = state * 2 + value
+            run = runs[rule]
+            if run is not None and (tape.startswith(run, cursor) if move[rule] > 0
+                                    else tape.endswith(run, 0, cursor + 1)):
+                break
+            tape[cursor] = write[rule]
+            cursor += move[rule]
+            state = next_state[rule]
+        else:
+            steps -= chunk
+            continue
+        steps -= taken
+        cursor, state, taken = apply_sweep(
+            tape, cursor, state // 3, steps, program.sweeps[state // 3 * 2 + value])
+        steps -= taken
+        state = state * 3 + 1 + value
     return (tape, cursor)
 
 def checksum(tape):
-    return sum(filter(lambda x: x == 1, tape.values()))
+    return tape.count(1)
 
 with open('aoc25.txt', 'r') as f:
     blueprint = parse_blueprint(f.read())
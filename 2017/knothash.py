@@ -0,0 +1,74 @@
+# Knot Hash (2017 days 10 and 14), computed for many keys at once.
+#
+# Each key is a row of a 2-D array. Rather than swapping pairs at
+# (position + i) % size, every row is kept rotated so that its current
+# position sits at column 0. One round step is then a single gather:
+# reverse the first `length` columns and rotate left by length + skip.
+
+import numpy as np
+
+SUFFIX = [17, 31, 73, 47, 23]
+
+def ascii_lengths(string):
+    return [ord(c) for c in string] + SUFFIX
+
+def _gather_table(values, size):
+    # table[i, shift] is the gather row for a step of length values[i]
+    # that then rotates left by shift: (distinct lengths, size, size)
+    # int16, at most 32 MiB for size 256.
+    columns = np.arange(size, dtype=np.int16)
+    rotated = (columns[:, None] + columns) % size
+    values = values.astype(np.int16)[:, None, None]
+    return np.where(rotated < values, values - 1 - rotated, rotated)
+
+def _sparse_group(lengths, rounds, size):
+    # lengths is a (keys, steps) array; every row has the same number
+    # of steps, so skip advances in lockstep across the group. Gather
+    # rows come from a table built once, so a step where every key has
+    # the same length is a single narrow gather by one shared row.
+    keys, steps = lengths.shape
+    numbers = np.tile(np.arange(size, dtype=np.min_scalar_type(size - 1)), (keys, 1))
+    position = np.zeros(keys, dtype=np.int64)
+    values, codes = np.unique(lengths, return_inverse=True)
+    codes = codes.reshape(lengths.shape)
+    table = _gather_table(values, size)
+    uniform = (lengths == lengths[:1]).all(axis=0)
+    skip = 0
+    for _ in range(rounds):
+        for step in range(steps):
+            if uniform[step]:
+                shift = (int(lengths[0, step]) + skip) % size
+                numbers = numbers[:, table[codes[0, step], shift]]
+            else:
+                shift = (lengths[:, step] + skip) % size
+                numbers = np.take_along_axis(numbers, table[codes[:, step], shift], axis=1)
+            position += shift
+            skip = (skip + 1) % size
+    # Undo the rotation so column i holds numbers[i].
+    unrotate = (np.arange(size) - position[:, None]) % size
+    return np.take_along_axis(numbers, unrotate, axis=1)
+
+def sparse_hashes(lengths_rows, rounds=64, size=256):
+    lengths_rows = [list(lengths) for lengths in lengths_rows]
+    result = np.empty((len(lengths_rows), size), dtype=np.min_scalar_type(size - 1))
+    groups = {}
+    for index, lengths in enumerate(lengths_rows):
+        groups.setdefault(len(lengths), []).append(index)
+    for indices in groups.values():
+        lengths = np.array([lengths_rows[i] for i in indices], dtype=np.int16)
+        lengths = lengths.reshape(len(indices), -1)
+        result[indices] = _sparse_group(lengths, rounds, size)
+    return result
+
+def hash_lengths(lengths, rounds=1, size=256):
+    return sparse_hashes([lengths], rounds, size)[0].tolist()
+
+def dense_hashes(strings):
+    sparse = sparse_hashes([ascii_lengths(s) for s in strings])
+    return np.bitwise_xor.reduce(sparse.reshape(-1, 16, 16), axis=2).astype(np.uint8)
+
+def knot_hashes(strings):
+    return [row.tobytes().hex() for row in dense_hashes(strings)]
+
+def knot_hash(string):
+    return knot_hashes([string])[0]